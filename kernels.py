@@ -0,0 +1,113 @@
+"""Numeric kernels for OHLCV aggregation (one is JIT-compiled with Numba when available)."""
+import numpy as np
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Stand-in for numba.njit that leaves the function as plain Python."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def ohlcv_bucket(ts, open_, high, low, close, volume, bucket_ns):
+    """
+    Aggregate timestamp-sorted rows into OHLCV bars of a fixed width.
+
+    Args:
+        ts: Sorted int64 timestamps in nanoseconds since epoch
+        open_, high, low, close: float64 price columns
+        volume: int64 volume column
+        bucket_ns: Bar width in nanoseconds
+
+    Returns:
+        Tuple of (bucket_start, open, high, low, close, volume) arrays with
+        one entry per non-empty bucket
+    """
+    n = ts.size
+    keys = ts // bucket_ns
+
+    # Sequential scan for bucket boundaries (rows are sorted, so each
+    # bucket is a contiguous run)
+    starts = np.empty(n + 1, np.int64)
+    n_buckets = 0
+    for i in range(n):
+        if i == 0 or keys[i] != keys[i - 1]:
+            starts[n_buckets] = i
+            n_buckets += 1
+    starts[n_buckets] = n
+
+    out_ts = np.empty(n_buckets, np.int64)
+    out_open = np.empty(n_buckets, np.float64)
+    out_high = np.empty(n_buckets, np.float64)
+    out_low = np.empty(n_buckets, np.float64)
+    out_close = np.empty(n_buckets, np.float64)
+    out_volume = np.empty(n_buckets, np.int64)
+
+    # One pass per bucket; a serial loop, since a parallel one started from a
+    # request worker thread keeps the threading layer from shutting down
+    for b in range(n_buckets):
+        lo = starts[b]
+        hi = starts[b + 1]
+        out_ts[b] = keys[lo] * bucket_ns
+        out_open[b] = open_[lo]
+        out_close[b] = close[hi - 1]
+        bucket_high = high[lo]
+        bucket_low = low[lo]
+        bucket_volume = 0
+        for i in range(lo, hi):
+            if high[i] > bucket_high:
+                bucket_high = high[i]
+            if low[i] < bucket_low:
+                bucket_low = low[i]
+            bucket_volume += volume[i]
+        out_high[b] = bucket_high
+        out_low[b] = bucket_low
+        out_volume[b] = bucket_volume
+
+    return out_ts, out_open, out_high, out_low, out_close, out_volume
+
+
+def ohlcv_bars(ts, open_, high, low, close, volume, bucket_ns):
+    """
+    Aggregate timestamp-sorted rows into OHLCV bars with NumPy ufuncs.
+    
+    Each bucket is a contiguous run of rows, so open and close are gathered
+    at the run boundaries and high, low and volume come from one reduceat
+    pass each, without building a DatetimeIndex or resampler.
+    
+    Args:
+        ts: Sorted int64 timestamps in nanoseconds since epoch
+        open_, high, low, close: float64 price columns
+        volume: int64 volume column
+        bucket_ns: Bar width in nanoseconds
+    
+    Returns:
+        Tuple of (bucket_start, open, high, low, close, volume) arrays with
+        one entry per non-empty bucket
+    """
+    keys = ts // bucket_ns
+    
+    # A bucket starts at the first row and wherever the key changes
+    is_start = np.empty(keys.size, np.bool_)
+    is_start[:1] = True
+    np.not_equal(keys[1:], keys[:-1], out=is_start[1:])
+    starts = np.flatnonzero(is_start)
+    if starts.size == 0:
+        empty = np.empty(0, np.float64)
+        return (np.empty(0, np.int64), empty, empty, empty, empty, np.empty(0, np.int64))
+    last = np.append(starts[1:], keys.size) - 1
+    
+    return (
+        keys[starts] * bucket_ns,
+        open_[starts],
+        np.maximum.reduceat(high, starts),
+        np.minimum.reduceat(low, starts),
+        close[last],
+        np.add.reduceat(volume, starts),
+    )
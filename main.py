@@ -1,34 +1,87 @@
 """FastAPI application for financial time-series endpoints."""
+import asyncio
+import email.message
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional
+from typing import Any, AsyncIterator, Callable, Dict, Optional, TypeVar
 
-from fastapi import FastAPI, HTTPException, Query, status
-from fastapi.responses import JSONResponse
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import ValidationError
+from pydantic.json_schema import models_json_schema
 
 from models import (
     ErrorResponse,
     IntervalEnum,
+    OHLCVQueryParams,
     OHLCVResponse,
     TradeIngestRequest,
     TradeIngestResponse,
 )
+from repository import flush_repository
 from services import (
     DataNotFoundError,
     TradeIngestionError,
     TradeService,
+    get_ingest_batcher,
     get_trade_service,
 )
 
 
+# Result type of a service query
+T = TypeVar("T")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Write trades still buffered by the repository when the server shuts down."""
+    yield
+    # Never creates the repository just to flush it
+    flush_repository()
+
+
 # Create FastAPI application
 app = FastAPI(
     title="Financial Time-Series API",
     description="API for ingesting and querying financial trade data",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
+# Schemas of the ingest body models, which FastAPI doesn't collect because
+# the route parses its body by hand; published under components/schemas
+_, _INGEST_BODY_SCHEMAS = models_json_schema(
+    [(TradeIngestRequest, "validation")],
+    ref_template="#/components/schemas/{model}",
+)
+
+
+def openapi() -> Dict[str, Any]:
+    """Build the OpenAPI schema once, adding the ingest body's component schemas."""
+    if not app.openapi_schema:
+        schema = FastAPI.openapi(app)
+        schemas = schema.setdefault("components", {}).setdefault("schemas", {})
+        schemas.update(_INGEST_BODY_SCHEMAS["$defs"])
+    return app.openapi_schema
+
+
+app.openapi = openapi
+
+
+def _is_json_content_type(content_type: Optional[str]) -> bool:
+    """Tell whether a Content-Type header declares JSON, as FastAPI's strict check does."""
+    if not content_type:
+        return False
+    message = email.message.Message()
+    message["content-type"] = content_type
+    subtype = message.get_content_subtype()
+    return message.get_content_maintype() == "application" and (
+        subtype == "json" or subtype.endswith("+json")
+    )
+
+
 # Dependency injection for service
 def get_service() -> TradeService:
     """Get trade service instance."""
@@ -46,8 +99,17 @@ def get_service() -> TradeService:
     },
     summary="Ingest Trade Events",
     description="Ingests trade event data for a single financial symbol.",
+    # The body is parsed by hand (see below), so its schema is declared here
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {"$ref": "#/components/schemas/TradeIngestRequest"}}
+            },
+        },
+    },
 )
-async def ingest_trades(request: TradeIngestRequest) -> TradeIngestResponse:
+async def ingest_trades(raw_request: Request) -> TradeIngestResponse:
     """
     Ingest trade event data for a single financial symbol.
     
@@ -55,9 +117,39 @@ async def ingest_trades(request: TradeIngestRequest) -> TradeIngestResponse:
     - All trades in a single request must have the same symbol
     - Duplicate trades are detected and skipped (idempotency)
     """
+    # Validate the raw bytes in one pydantic-core pass instead of letting
+    # FastAPI json.loads() the body and then validate the resulting dicts
+    body = await raw_request.body()
+    # Same errors FastAPI gives for a declared body parameter: a missing body,
+    # and one not declared as JSON, which is not parsed (so cross-site
+    # "simple" POSTs cannot ingest)
+    if not body:
+        raise RequestValidationError(
+            [{"type": "missing", "loc": ("body",), "msg": "Field required", "input": None}]
+        )
+    if not _is_json_content_type(raw_request.headers.get("content-type")):
+        raise RequestValidationError(
+            [{
+                "type": "model_attributes_type",
+                "loc": ("body",),
+                "msg": "Input should be a valid dictionary or object to extract fields from",
+                "input": body,
+            }],
+            body=body,
+        )
     try:
-        service = get_service()
-        response = service.ingest_trades(request.trades)
+        request = TradeIngestRequest.model_validate_json(body)
+    except ValidationError as e:
+        # Same 422 response FastAPI gives for a declared body parameter
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)],
+            body=body,
+        )
+    
+    try:
+        # Concurrent requests are coalesced into one write, which runs off
+        # the event loop
+        response = await get_ingest_batcher().submit(request.trades)
         return response
     except TradeIngestionError as e:
         raise HTTPException(
@@ -71,20 +163,7 @@ async def ingest_trades(request: TradeIngestRequest) -> TradeIngestResponse:
         )
 
 
-@app.get(
-    "/v1/stats/ohlc",
-    response_model=OHLCVResponse,
-    responses={
-        200: {"model": OHLCVResponse, "description": "Successful retrieval"},
-        400: {"model": ErrorResponse, "description": "Malformed query parameters"},
-        404: {"model": ErrorResponse, "description": "Symbol or data not found"},
-        422: {"model": ErrorResponse, "description": "Invalid interval value"},
-        500: {"model": ErrorResponse, "description": "Unexpected processing failure"},
-    },
-    summary="Get OHLCV Statistics",
-    description="Retrieves aggregated OHLCV statistics for a specified symbol and time range.",
-)
-async def get_ohlcv_stats(
+async def ohlcv_query(
     symbol: str = Query(
         ..., 
         min_length=1, 
@@ -102,14 +181,12 @@ async def get_ohlcv_stats(
         IntervalEnum.ONE_MIN,
         description="Aggregation interval: 1min, 5min, 1h, 1d"
     ),
-) -> OHLCVResponse:
+) -> OHLCVQueryParams:
     """
-    Retrieve aggregated OHLCV statistics for a specified symbol and time range.
+    Query parameters shared by the OHLCV endpoints.
     
-    - **symbol**: Trading symbol (required)
-    - **start**: Start of time range in ISO 8601 format (optional)
-    - **end**: End of time range in ISO 8601 format (optional)
-    - **interval**: Aggregation interval - 1min, 5min, 1h, 1d (default: 1min)
+    Raises:
+        HTTPException: 400 if start is not before end
     """
     # Validate date range
     if start and end and start >= end:
@@ -117,16 +194,30 @@ async def get_ohlcv_stats(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Start date must be before end date"
         )
+    # The parameters were validated by FastAPI and the check above
+    return OHLCVQueryParams.model_construct(
+        symbol=symbol,
+        start=start,
+        end=end,
+        interval=interval or IntervalEnum.ONE_MIN
+    )
+
+
+async def _run_ohlcv_query(query: Callable[..., T], params: OHLCVQueryParams) -> T:
+    """
+    Run a service query off the event loop, mapping its errors to HTTP errors.
     
+    Raises:
+        HTTPException: 404 if there is no data, 500 on any other failure
+    """
     try:
-        service = get_service()
-        response = service.get_ohlcv_stats(
-            symbol=symbol,
-            start=start,
-            end=end,
-            interval=interval or IntervalEnum.ONE_MIN
+        return await asyncio.to_thread(
+            query,
+            symbol=params.symbol,
+            start=params.start,
+            end=params.end,
+            interval=params.interval
         )
-        return response
     except DataNotFoundError as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -139,6 +230,62 @@ async def get_ohlcv_stats(
         )
 
 
+@app.get(
+    "/v1/stats/ohlc",
+    response_model=OHLCVResponse,
+    responses={
+        200: {"model": OHLCVResponse, "description": "Successful retrieval"},
+        400: {"model": ErrorResponse, "description": "Malformed query parameters"},
+        404: {"model": ErrorResponse, "description": "Symbol or data not found"},
+        422: {"model": ErrorResponse, "description": "Invalid interval value"},
+        500: {"model": ErrorResponse, "description": "Unexpected processing failure"},
+    },
+    summary="Get OHLCV Statistics",
+    description="Retrieves aggregated OHLCV statistics for a specified symbol and time range.",
+)
+async def get_ohlcv_stats(
+    params: OHLCVQueryParams = Depends(ohlcv_query),
+) -> OHLCVResponse:
+    """
+    Retrieve aggregated OHLCV statistics for a specified symbol and time range.
+    
+    - **symbol**: Trading symbol (required)
+    - **start**: Start of time range in ISO 8601 format (optional)
+    - **end**: End of time range in ISO 8601 format (optional)
+    - **interval**: Aggregation interval - 1min, 5min, 1h, 1d (default: 1min)
+    """
+    return await _run_ohlcv_query(get_service().get_ohlcv_stats, params)
+
+
+@app.get(
+    "/v1/stats/ohlc.ndjson",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {"application/x-ndjson": {}},
+            "description": "One OHLCV record per line",
+        },
+        400: {"model": ErrorResponse, "description": "Malformed query parameters"},
+        404: {"model": ErrorResponse, "description": "Symbol or data not found"},
+        422: {"model": ErrorResponse, "description": "Invalid interval value"},
+        500: {"model": ErrorResponse, "description": "Unexpected processing failure"},
+    },
+    summary="Stream OHLCV Statistics",
+    description="Streams aggregated OHLCV statistics as newline-delimited JSON.",
+)
+async def stream_ohlcv_stats(
+    params: OHLCVQueryParams = Depends(ohlcv_query),
+) -> StreamingResponse:
+    """
+    Stream aggregated OHLCV statistics as NDJSON, one record per line.
+    
+    Takes the same parameters as `/v1/stats/ohlc`; records are encoded and
+    sent as they are produced instead of as one JSON document.
+    """
+    lines = await _run_ohlcv_query(get_service().iter_ohlcv_stats, params)
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
@@ -1,9 +1,15 @@
 """Pydantic models for request/response validation."""
-from datetime import datetime
+from datetime import datetime, timezone
 from enum import Enum
 from typing import List, Optional
 
-from pydantic import BaseModel, Field, field_validator, model_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+
+
+# Timestamps are stored as int64 nanoseconds since epoch, which covers this
+# range (naive timestamps are taken as UTC)
+MIN_TIMESTAMP = datetime(1677, 9, 21, 0, 12, 43, 145225, tzinfo=timezone.utc)
+MAX_TIMESTAMP = datetime(2262, 4, 11, 23, 47, 16, 854775, tzinfo=timezone.utc)
 
 
 class IntervalEnum(str, Enum):
@@ -16,10 +22,26 @@ class IntervalEnum(str, Enum):
 
 class TradeEvent(BaseModel):
     """Single trade event model."""
+    model_config = ConfigDict(frozen=True)
+    
     timestamp: datetime
     symbol: str = Field(..., min_length=1, description="Trading symbol identifier")
     price: float = Field(..., gt=0, description="Trade execution price")
-    volume: int = Field(..., gt=0, description="Trade volume")
+    # Volumes are stored as int64
+    volume: int = Field(..., gt=0, le=2**63 - 1, description="Trade volume")
+
+    @field_validator("timestamp")
+    @classmethod
+    def validate_timestamp_range(cls, v: datetime) -> datetime:
+        """Ensure the timestamp fits the int64 nanosecond storage format."""
+        lower, upper = MIN_TIMESTAMP, MAX_TIMESTAMP
+        if v.tzinfo is None:
+            lower, upper = lower.replace(tzinfo=None), upper.replace(tzinfo=None)
+        if not lower <= v <= upper:
+            raise ValueError(
+                f"Timestamp must be between {MIN_TIMESTAMP.isoformat()} and {MAX_TIMESTAMP.isoformat()}"
+            )
+        return v
 
     @field_validator("symbol")
     @classmethod
@@ -38,11 +60,15 @@ class TradeIngestRequest(BaseModel):
         if not self.trades:
             return self
         
-        symbols = {trade.symbol for trade in self.trades}
-        if len(symbols) > 1:
-            raise ValueError(
-                f"All trades must have the same symbol. Found: {sorted(symbols)}"
-            )
+        # Single pass that stops at the first mismatch; the set of symbols is
+        # only built for the error message
+        first = self.trades[0].symbol
+        for trade in self.trades:
+            if trade.symbol != first:
+                symbols = {t.symbol for t in self.trades}
+                raise ValueError(
+                    f"All trades must have the same symbol. Found: {sorted(symbols)}"
+                )
         return self
 
 
@@ -1,136 +1,273 @@
-"""Repository layer for CSV data access."""
-import os
-import hashlib
-from datetime import datetime
+"""Repository layer for trade data access."""
+import atexit
+import csv
+import logging
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from itertools import repeat
 from pathlib import Path
-from typing import List, Optional, Set
+from typing import Any, Dict, List, Optional, Set, Tuple
 import threading
+import time
+import warnings
 
+import numpy as np
 import pandas as pd
 
 from models import TradeEvent
 
+try:
+    import pyarrow  # noqa: F401
+    # Multi-threaded parser that reads into columnar buffers
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
 
-class CSVRepository:
-    """Repository for managing trade data in CSV format."""
+logger = logging.getLogger(__name__)
+
+# Epochs used to convert datetimes to nanoseconds
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+
+# Range of timestamps representable as int64 nanoseconds
+_MIN_TIMESTAMP = pd.Timestamp.min.tz_localize("UTC")
+_MAX_TIMESTAMP = pd.Timestamp.max.tz_localize("UTC")
+
+
+class BaseRepository(ABC):
+    """
+    Base class for trade repositories.
     
-    # CSV file path
-    DEFAULT_CSV_PATH = Path(__file__).parent / "trades.csv"
+    Holds the per-symbol cache that queries are answered from and the
+    idempotency keys; subclasses decide how ingested trades are stored.
+    """
     
-    # CSV columns for OHLCV data
-    COLUMNS = ["timestamp", "symbol", "open", "high", "low", "close", "volume"]
+    # Columns of the per-symbol cache (timestamp as int64 ns since epoch)
+    CACHE_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]
     
-    # Lock for thread-safe file operations
-    _lock = threading.Lock()
+    # Array dtype of each cache column
+    CACHE_DTYPES = {
+        "timestamp": np.int64,
+        "open": np.float64,
+        "high": np.float64,
+        "low": np.float64,
+        "close": np.float64,
+        "volume": np.int64,
+    }
     
-    def __init__(self, csv_path: Optional[Path] = None):
-        """Initialize repository with optional custom CSV path."""
-        self.csv_path = csv_path or self.DEFAULT_CSV_PATH
-        # Instance-level set for tracking ingested trade hashes (for idempotency)
-        self._ingested_hashes: Set[str] = set()
-        self._ensure_csv_exists()
-        self._load_existing_hashes()
+    # Rows allocated for a symbol's first column buffers; doubled when full
+    INITIAL_CAPACITY = 1024
     
-    def _ensure_csv_exists(self) -> None:
-        """Create CSV file with headers if it doesn't exist."""
-        if not self.csv_path.exists():
-            df = pd.DataFrame(columns=self.COLUMNS)
-            df.to_csv(self.csv_path, index=False)
+    # Lock for thread-safe data operations
+    _lock = threading.Lock()
     
-    def _load_existing_hashes(self) -> None:
-        """Load hashes of existing records for idempotency check."""
-        try:
-            df = self._read_csv()
-            if not df.empty:
-                for _, row in df.iterrows():
-                    hash_key = self._compute_hash(
-                        timestamp=row["timestamp"],
-                        symbol=row["symbol"],
-                        close=row["close"],
-                        volume=row["volume"]
-                    )
-                    self._ingested_hashes.add(hash_key)
-        except Exception:
-            # If file is corrupted or empty, start fresh
-            pass
+    def __init__(self):
+        """Initialize an empty cache."""
+        # Cache rows (CACHE_COLUMNS order) not yet merged into _columns, so
+        # ingests never touch the arrays; merged when a symbol is read
+        self._pending: Dict[str, List[tuple]] = {}
+        # Instance-level set of (timestamp ns, symbol, close, volume) keys of
+        # ingested trades (for idempotency)
+        self._ingested_hashes: Set[Tuple[int, str, float, int]] = set()
+        # One array per CACHE_COLUMNS entry for each symbol, sorted by int64
+        # nanosecond timestamp. Only the first _sizes[symbol] rows are in use;
+        # the spare capacity lets merges append without copying, and rows in
+        # use are never modified in place (query results are views of them)
+        self._columns: Dict[str, Dict[str, np.ndarray]] = {}
+        self._sizes: Dict[str, int] = {}
     
     @staticmethod
-    def _compute_hash(timestamp: str, symbol: str, close: float, volume: int) -> str:
-        """Compute a unique hash for a trade record."""
-        data = f"{timestamp}|{symbol}|{close}|{volume}"
-        return hashlib.md5(data.encode()).hexdigest()
+    def _to_ns(value: datetime) -> int:
+        """Convert a datetime to nanoseconds since epoch (naive values are taken as UTC)."""
+        epoch = _EPOCH if value.tzinfo is not None else _NAIVE_EPOCH
+        delta = value - epoch
+        return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
     
-    def _read_csv(self) -> pd.DataFrame:
-        """Read CSV file into DataFrame."""
-        if not self.csv_path.exists():
-            return pd.DataFrame(columns=self.COLUMNS)
+    def _merge_pending(self, symbol: str) -> None:
+        """Merge a symbol's pending rows into its column buffers (caller holds the lock)."""
+        rows = self._pending.get(symbol)
+        if not rows:
+            return
         
-        df = pd.read_csv(self.csv_path)
-        if df.empty:
-            return pd.DataFrame(columns=self.COLUMNS)
-        return df
+        new = {
+            name: np.array(values, dtype=self.CACHE_DTYPES[name])
+            for name, values in zip(self.CACHE_COLUMNS, zip(*rows))
+        }
+        self._append_columns(symbol, new)
+        # Dropped only once merged, so rows whose keys are already recorded
+        # can't be lost if the conversion fails
+        del self._pending[symbol]
+    
+    def _append_columns(self, symbol: str, new: Dict[str, np.ndarray]) -> None:
+        """
+        Add rows to a symbol's column buffers, keeping them sorted (caller holds the lock).
+        
+        Args:
+            symbol: Symbol the rows belong to
+            new: One array per CACHE_COLUMNS entry, in ingestion order
+        """
+        timestamps = new["timestamp"]
+        if np.any(timestamps[1:] < timestamps[:-1]):
+            order = np.argsort(timestamps, kind="stable")
+            new = {name: column[order] for name, column in new.items()}
+        
+        columns = self._columns.get(symbol)
+        size = self._sizes.get(symbol, 0)
+        if size and new["timestamp"][0] < columns["timestamp"][size - 1]:
+            # Late rows: rebuild sorted (stable, so earlier rows win ties)
+            merged = {name: np.concatenate([columns[name][:size], new[name]]) for name in new}
+            order = np.argsort(merged["timestamp"], kind="stable")
+            new = {name: column[order] for name, column in merged.items()}
+            columns, size = None, 0
+        
+        total = size + len(new["timestamp"])
+        capacity = len(columns["timestamp"]) if columns is not None else 0
+        if total > capacity:
+            # Grow geometrically so appends cost amortized O(rows added)
+            capacity = max(capacity, self.INITIAL_CAPACITY)
+            while capacity < total:
+                capacity *= 2
+            grown = {}
+            for name in self.CACHE_COLUMNS:
+                grown[name] = np.empty(capacity, dtype=self.CACHE_DTYPES[name])
+                if size:
+                    grown[name][:size] = columns[name][:size]
+            columns = grown
+        
+        for name in self.CACHE_COLUMNS:
+            columns[name][size:total] = new[name]
+        self._columns[symbol] = columns
+        self._sizes[symbol] = total
     
     def ingest_trades(self, trades: List[TradeEvent]) -> tuple[int, int]:
         """
-        Ingest trade events into CSV storage.
+        Ingest trade events.
         
         Converts trade events (with price) to OHLCV format where:
         - open = high = low = close = price (single trade point)
         
         Returns:
             Tuple of (records_ingested, duplicates_skipped)
+        
+        Raises:
+            ValueError: If the trades do not all share one symbol
         """
         if not trades:
             return 0, 0
+        return self.ingest_trade_batches([trades])[0]
+    
+    def ingest_trade_batches(self, batches: List[List[TradeEvent]]) -> List[Tuple[int, int]]:
+        """
+        Ingest several batches of trade events under a single lock.
         
-        new_records = []
-        duplicates = 0
+        All trades in a batch must share one symbol. Batches are
+        deduplicated in order, so a trade repeated in a later batch counts as
+        a duplicate there. New rows are visible to queries immediately.
         
-        for trade in trades:
-            timestamp_str = trade.timestamp.isoformat()
-            hash_key = self._compute_hash(
-                timestamp=timestamp_str,
-                symbol=trade.symbol,
-                close=trade.price,
-                volume=trade.volume
-            )
-            
-            # Idempotency check
-            if hash_key in self._ingested_hashes:
-                duplicates += 1
-                continue
-            
-            # Convert trade event to OHLCV record
-            # For a single trade, OHLC values are all the same (the trade price)
-            record = {
-                "timestamp": timestamp_str,
-                "symbol": trade.symbol,
-                "open": trade.price,
-                "high": trade.price,
-                "low": trade.price,
-                "close": trade.price,
-                "volume": trade.volume
-            }
-            new_records.append(record)
-            self._ingested_hashes.add(hash_key)
-        
-        if new_records:
-            with self._lock:
-                new_df = pd.DataFrame(new_records, columns=self.COLUMNS)
+        Returns:
+            One (records_ingested, duplicates_skipped) tuple per batch
+        
+        Raises:
+            ValueError: If a batch mixes symbols; nothing is stored then
+        """
+        # Rows are cached under the batch symbol but written to CSV with each
+        # trade's own symbol, so a mixed batch is refused before anything is
+        # stored rather than letting the two diverge
+        for trades in batches:
+            if trades and any(trade.symbol != trades[0].symbol for trade in trades):
+                raise ValueError("All trades in a batch must have the same symbol")
+        
+        results = []
+        new_trades = []
+        # Hoisted out of the per-trade loop
+        seen = self._ingested_hashes
+        to_ns = self._to_ns
+        
+        # The duplicate check, persistence and cache update happen under one
+        # lock so concurrent ingests (from worker threads) cannot interleave
+        with self._lock:
+            for trades in batches:
+                if not trades:
+                    results.append((0, 0))
+                    continue
+                
+                # Every trade in a batch shares one symbol (checked above), so
+                # it is read once per batch
+                symbol = trades[0].symbol
+                timestamps = [to_ns(trade.timestamp) for trade in trades]
+                prices = [trade.price for trade in trades]
+                volumes = [trade.volume for trade in trades]
+                keys = list(zip(timestamps, repeat(symbol), prices, volumes))
                 
-                # Append to existing CSV
-                if self.csv_path.exists() and os.path.getsize(self.csv_path) > 0:
-                    existing_df = self._read_csv()
-                    if existing_df.empty:
-                        combined_df = new_df
-                    else:
-                        combined_df = pd.concat([existing_df, new_df], ignore_index=True)
+                # Idempotency check for the whole batch at once: in the common
+                # case of no duplicates, keys and rows are built with set and
+                # zip operations instead of per-trade Python steps
+                fresh = set(keys)
+                if len(fresh) == len(keys) and seen.isdisjoint(fresh):
+                    seen.update(fresh)
+                    new_trades.extend(trades)
+                    # Convert trade events to OHLCV records
+                    # For a single trade, OHLC values are all the same (the trade price)
+                    # The cache row carries the timestamp as int64 ns, converted
+                    # straight from the datetime rather than re-parsed
+                    rows = list(zip(timestamps, prices, prices, prices, prices, volumes))
+                    duplicates = 0
                 else:
-                    combined_df = new_df
+                    rows, duplicates = self._dedupe_trades(trades, keys, new_trades)
                 
-                combined_df.to_csv(self.csv_path, index=False)
+                if rows:
+                    self._pending.setdefault(symbol, []).extend(rows)
+                results.append((len(rows), duplicates))
+            
+            self._persist(new_trades)
         
-        return len(new_records), duplicates
+        return results
+    
+    def _dedupe_trades(
+        self,
+        trades: List[TradeEvent],
+        keys: List[Tuple[int, str, float, int]],
+        new_trades: List[TradeEvent],
+    ) -> Tuple[List[tuple], int]:
+        """
+        Skip duplicates one trade at a time (caller holds the lock).
+        
+        Args:
+            trades: Trades of a single batch
+            keys: Idempotency key of each trade
+            new_trades: List the accepted trades are appended to
+        
+        Returns:
+            Tuple of (cache rows of accepted trades, duplicates_skipped)
+        """
+        seen = self._ingested_hashes
+        rows = []
+        duplicates = 0
+        for trade, key in zip(trades, keys):
+            if key in seen:
+                duplicates += 1
+                continue
+            seen.add(key)
+            new_trades.append(trade)
+            timestamp_ns, _, price, volume = key
+            rows.append((timestamp_ns, price, price, price, price, volume))
+        return rows, duplicates
+    
+    @abstractmethod
+    def _persist(self, trades: List[TradeEvent]) -> None:
+        """Store newly ingested trades (caller holds the lock)."""
+    
+    @abstractmethod
+    def _clear_storage(self) -> None:
+        """Discard stored trades (caller holds the lock)."""
+    
+    @abstractmethod
+    def flush(self) -> None:
+        """Write any buffered trades to storage."""
+    
+    def close(self) -> None:
+        """Flush the repository before it is discarded."""
+        self.flush()
     
     def get_data_by_symbol(
         self, 
@@ -147,50 +284,249 @@ class CSVRepository:
             end: Optional end of time range
             
         Returns:
-            DataFrame with filtered OHLCV data
+            DataFrame with filtered OHLCV data sorted by timestamp, which is
+            given as int64 nanoseconds since epoch (UTC); its columns are
+            read-only views of the cache
         """
-        df = self._read_csv()
-        
-        if df.empty:
-            return df
-        
-        # Filter by symbol
-        df = df[df["symbol"].str.upper() == symbol.upper()]
-        
-        if df.empty:
-            return df
+        symbol = symbol.upper()
+        with self._lock:
+            self._merge_pending(symbol)
+            columns = self._columns.get(symbol)
+            size = self._sizes.get(symbol, 0)
         
-        # Parse timestamps
-        df["timestamp"] = pd.to_datetime(df["timestamp"])
+        if columns is None:
+            return pd.DataFrame(columns=self.CACHE_COLUMNS)
         
-        # Filter by time range
-        if start:
-            df = df[df["timestamp"] >= start]
-        if end:
-            df = df[df["timestamp"] <= end]
+        # Bounds are converted once and compared as integers; the column is
+        # sorted, so each bound is a binary search rather than a full scan
+        timestamps = columns["timestamp"][:size]
+        lo = np.searchsorted(timestamps, self._to_ns(start), side="left") if start else 0
+        hi = np.searchsorted(timestamps, self._to_ns(end), side="right") if end else size
         
-        return df.sort_values("timestamp")
+        # The frame wraps read-only views of the buffers rather than copies
+        views = {}
+        for name in self.CACHE_COLUMNS:
+            view = columns[name][lo:hi]
+            view.flags.writeable = False
+            views[name] = view
+        return pd.DataFrame(views, copy=False)
     
     def symbol_exists(self, symbol: str) -> bool:
         """Check if a symbol exists in the dataset."""
-        df = self._read_csv()
-        if df.empty:
-            return False
-        return symbol.upper() in df["symbol"].str.upper().values
+        symbol = symbol.upper()
+        # Read without the lock: pending is checked first because a merge
+        # adds the symbol to the columns before removing it from pending
+        return symbol in self._pending or symbol in self._columns
     
     def clear_data(self) -> None:
         """Clear all data (useful for testing)."""
         with self._lock:
-            df = pd.DataFrame(columns=self.COLUMNS)
-            df.to_csv(self.csv_path, index=False)
+            self._clear_storage()
             self._ingested_hashes.clear()
+            self._columns.clear()
+            self._sizes.clear()
+            self._pending.clear()
+
+
+class InMemoryRepository(BaseRepository):
+    """Repository keeping trade data in memory only (nothing is persisted)."""
+    
+    def _persist(self, trades: List[TradeEvent]) -> None:
+        """Nothing to store; the cache holds the trades."""
+    
+    def _clear_storage(self) -> None:
+        """Nothing to discard besides the cache."""
+    
+    def flush(self) -> None:
+        """Nothing to write."""
+
+
+class CSVRepository(BaseRepository):
+    """
+    Repository for managing trade data in CSV format.
+    
+    Ingested rows are visible to queries immediately; they reach the file
+    once FLUSH_ROWS rows are buffered, FLUSH_INTERVAL has elapsed, flush()
+    is called or the process exits.
+    """
+    
+    # CSV file path
+    DEFAULT_CSV_PATH = Path(__file__).parent / "trades.csv"
+    
+    # CSV columns for OHLCV data
+    COLUMNS = ["timestamp", "symbol", "open", "high", "low", "close", "volume"]
+    
+    # Column dtypes used when parsing the CSV (nullable Int64, since pyarrow
+    # silently wraps an out-of-range int64 volume instead of failing)
+    DTYPES = {
+        "timestamp": str,
+        "symbol": str,
+        "open": "float64",
+        "high": "float64",
+        "low": "float64",
+        "close": "float64",
+        "volume": "Int64",
+    }
+    
+    # Price columns, checked to be finite and positive on load
+    PRICE_COLUMNS = ["open", "high", "low", "close"]
+    
+    # Buffered rows are appended to the CSV once this many are pending...
+    FLUSH_ROWS = 1000
+    
+    # ...or once this many seconds have passed since the last write
+    FLUSH_INTERVAL = 1.0
+    
+    def __init__(self, csv_path: Optional[Path] = None):
+        """Initialize repository with optional custom CSV path."""
+        # The in-memory cache holds a copy of the CSV contents so queries
+        # never re-parse the file
+        super().__init__()
+        self.csv_path = csv_path or self.DEFAULT_CSV_PATH
+        # CSV rows not yet written to disk
+        self._buffer: List[tuple] = []
+        self._last_flush = time.monotonic()
+        self._ensure_csv_exists()
+        self._load_existing_hashes()
+        # Don't lose buffered rows on interpreter shutdown
+        atexit.register(self.flush)
+    
+    def _ensure_csv_exists(self) -> None:
+        """Create CSV file with headers if it doesn't exist or is empty."""
+        if not self.csv_path.exists() or self.csv_path.stat().st_size == 0:
+            self._write_header()
+    
+    def _write_header(self) -> None:
+        """Truncate the CSV to just its header row."""
+        self.csv_path.write_text(",".join(self.COLUMNS) + "\n")
+    
+    def _load_existing_hashes(self) -> None:
+        """
+        Load existing records into the cache and their keys for idempotency check.
+        
+        Rows with a missing symbol, or a timestamp, price or volume that
+        cannot be parsed or stored in the cache dtypes, are skipped with a
+        warning, so one bad row does not drop the rest.
+        """
+        try:
+            # A failed Int64 cast warns before raising; the fallback handles it
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)
+                df = self._read_csv(dtype=self.DTYPES)
+        except (ValueError, OverflowError):
+            # A cell does not fit its dtype; re-read everything as text with
+            # the C engine (pyarrow infers types before casting to str) and
+            # drop only the bad rows below
+            df = self._read_csv(dtype=dict.fromkeys(self.COLUMNS, str), engine="c")
+        if df.empty:
+            return
+        
+        parsed = pd.to_datetime(df["timestamp"], utc=True, format="ISO8601", errors="coerce")
+        valid = parsed.between(_MIN_TIMESTAMP, _MAX_TIMESTAMP) & df["symbol"].notna()
+        for name in self.PRICE_COLUMNS:
+            df[name] = pd.to_numeric(df[name], errors="coerce")
+            valid &= np.isfinite(df[name]) & (df[name] > 0)
+        volume = df["volume"]
+        if not pd.api.types.is_integer_dtype(volume):
+            # Only plain digit strings are parsed, so volumes stay exact
+            # integers instead of passing through float64
+            volume = volume.where(volume.str.fullmatch(r"\d{1,19}", na=False))
+            volume = pd.to_numeric(volume, errors="coerce", dtype_backend="numpy_nullable")
+        valid &= volume.between(1, 2**63 - 1).fillna(False)
+        if not valid.all():
+            logger.warning(
+                "Skipping %d row(s) of %s with an invalid or out-of-range value",
+                int((~valid).sum()), self.csv_path,
+            )
+            df, parsed, volume = df[valid], parsed[valid], volume[valid]
+        df["timestamp"] = parsed.dt.as_unit("ns").astype("int64")
+        df["volume"] = volume.astype("int64")
+        
+        # Stored symbols are already uppercase (TradeEvent normalizes them)
+        for symbol, group in df.groupby("symbol", sort=False):
+            self._append_columns(symbol, {
+                name: group[name].to_numpy(dtype=self.CACHE_DTYPES[name])
+                for name in self.CACHE_COLUMNS
+            })
+        # Zip the raw columns instead of building a Series per row
+        self._ingested_hashes.update(zip(
+            df["timestamp"].to_numpy().tolist(),
+            df["symbol"].to_numpy().tolist(),
+            df["close"].to_numpy().tolist(),
+            df["volume"].to_numpy().tolist(),
+        ))
+    
+    def _read_csv(
+        self,
+        dtype: Optional[Dict[str, Any]] = None,
+        engine: Optional[str] = None
+    ) -> pd.DataFrame:
+        """
+        Read CSV file into DataFrame.
+        
+        Args:
+            dtype: Optional column dtypes; when given, only those columns are parsed
+            engine: Parser to use instead of CSV_ENGINE
+        """
+        usecols = list(dtype) if dtype else None
+        columns = usecols or self.COLUMNS
+        if not self.csv_path.exists():
+            return pd.DataFrame(columns=columns)
+        
+        df = pd.read_csv(self.csv_path, usecols=usecols, dtype=dtype, engine=engine or CSV_ENGINE)
+        if df.empty:
+            return pd.DataFrame(columns=columns)
+        return df
+    
+    def _persist(self, trades: List[TradeEvent]) -> None:
+        """Buffer CSV rows for new trades and write them if due (caller holds the lock)."""
+        # Row values follow COLUMNS order
+        self._buffer.extend(
+            (trade.timestamp.isoformat(), trade.symbol, trade.price, trade.price,
+             trade.price, trade.price, trade.volume)
+            for trade in trades
+        )
+        self._maybe_flush()
+    
+    def _clear_storage(self) -> None:
+        """Truncate the CSV and drop buffered rows (caller holds the lock)."""
+        self._write_header()
+        self._buffer.clear()
+    
+    def _maybe_flush(self) -> None:
+        """Write buffered rows once enough are pending or are old enough (caller holds the lock)."""
+        if (
+            len(self._buffer) >= self.FLUSH_ROWS
+            or time.monotonic() - self._last_flush >= self.FLUSH_INTERVAL
+        ):
+            self._write_buffer()
+    
+    def _write_buffer(self) -> None:
+        """Append buffered rows to the CSV (caller holds the lock)."""
+        if self._buffer:
+            # Append only the new rows; the header is written once by
+            # _ensure_csv_exists, so the existing file is never re-read
+            with open(self.csv_path, "a", newline="", buffering=1 << 20) as f:
+                csv.writer(f).writerows(self._buffer)
+            self._buffer.clear()
+        self._last_flush = time.monotonic()
+    
+    def flush(self) -> None:
+        """Write any buffered rows to the CSV."""
+        with self._lock:
+            self._write_buffer()
+    
+    def close(self) -> None:
+        """Flush the CSV and drop the exit hook, which would otherwise keep this instance alive."""
+        self.flush()
+        atexit.unregister(self.flush)
 
 
 # Singleton instance for the application
-_repository_instance: Optional[CSVRepository] = None
+_repository_instance: Optional[BaseRepository] = None
 
 
-def get_repository() -> CSVRepository:
+def get_repository() -> BaseRepository:
     """Get or create the repository singleton."""
     global _repository_instance
     if _repository_instance is None:
@@ -198,9 +534,23 @@ def get_repository() -> CSVRepository:
     return _repository_instance
 
 
-def reset_repository(csv_path: Optional[Path] = None) -> CSVRepository:
-    """Reset repository instance (useful for testing)."""
+def flush_repository() -> None:
+    """Flush the repository singleton, if one has been created."""
+    if _repository_instance is not None:
+        _repository_instance.flush()
+
+
+def reset_repository(csv_path: Optional[Path] = None) -> BaseRepository:
+    """
+    Reset repository instance (useful for testing).
+    
+    Args:
+        csv_path: CSV file to back the new repository; without one, the
+            repository is kept in memory only
+    """
     global _repository_instance
-    _repository_instance = CSVRepository(csv_path)
+    if _repository_instance is not None:
+        _repository_instance.close()
+    _repository_instance = CSVRepository(csv_path) if csv_path else InMemoryRepository()
     return _repository_instance
 
@@ -1,9 +1,12 @@
 """Service layer for business logic."""
+import asyncio
 from datetime import datetime
-from typing import List, Optional
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
+import orjson
 import pandas as pd
 
+from kernels import NUMBA_AVAILABLE, ohlcv_bars, ohlcv_bucket
 from models import (
     IntervalEnum,
     OHLCVRecord,
@@ -11,7 +14,16 @@ from models import (
     TradeEvent,
     TradeIngestResponse,
 )
-from repository import CSVRepository, get_repository
+from repository import BaseRepository, get_repository
+
+
+# Bucket width in nanoseconds per interval, used by the aggregation kernels
+BUCKET_NS: Dict[IntervalEnum, int] = {
+    IntervalEnum.ONE_MIN: 60 * 10**9,
+    IntervalEnum.FIVE_MIN: 5 * 60 * 10**9,
+    IntervalEnum.ONE_HOUR: 60 * 60 * 10**9,
+    IntervalEnum.ONE_DAY: 24 * 60 * 60 * 10**9,
+}
 
 
 class TradeIngestionError(Exception):
@@ -27,20 +39,18 @@ class DataNotFoundError(Exception):
 class TradeService:
     """Service for handling trade-related business logic."""
     
-    # Mapping from interval enum to pandas resample frequency
-    INTERVAL_MAP = {
-        IntervalEnum.ONE_MIN: "1min",
-        IntervalEnum.FIVE_MIN: "5min",
-        IntervalEnum.ONE_HOUR: "1h",
-        IntervalEnum.ONE_DAY: "1D",
-    }
+    # Average rows per bar below which the compiled kernel beats the NumPy
+    # one: its per-row loop wins on short runs (e.g. 200k rows into 1min
+    # bars: 2.6 ms vs 5.4 ms), while reduceat wins on long runs at any size
+    # (1M rows into 1h bars: 8.5 ms vs 2.5 ms)
+    KERNEL_MAX_ROWS_PER_BAR = 16
     
-    def __init__(self, repository: Optional[CSVRepository] = None):
+    def __init__(self, repository: Optional[BaseRepository] = None):
         """Initialize service with optional repository (for testing)."""
         self._repository = repository
     
     @property
-    def repository(self) -> CSVRepository:
+    def repository(self) -> BaseRepository:
         """Get repository instance (lazy loading for dependency injection)."""
         if self._repository is None:
             self._repository = get_repository()
@@ -59,31 +69,58 @@ class TradeService:
         Raises:
             TradeIngestionError: If ingestion fails
         """
-        if not trades:
-            raise TradeIngestionError("No trades provided for ingestion")
+        return self.ingest_trade_batches([trades])[0]
+    
+    def ingest_trade_batches(
+        self,
+        batches: List[List[TradeEvent]]
+    ) -> List[TradeIngestResponse]:
+        """
+        Ingest several requests' trade events with a single storage write.
         
-        try:
-            records_ingested, duplicates_skipped = self.repository.ingest_trades(trades)
-            
-            symbol = trades[0].symbol
+        Args:
+            batches: One list of trade events per ingest request
             
-            if records_ingested == 0 and duplicates_skipped > 0:
-                message = f"All {duplicates_skipped} trades were duplicates and skipped"
-            elif duplicates_skipped > 0:
-                message = f"Ingested {records_ingested} trades, skipped {duplicates_skipped} duplicates"
-            else:
-                message = f"Successfully ingested {records_ingested} trades"
+        Returns:
+            One TradeIngestResponse per batch, in the same order
             
-            return TradeIngestResponse(
-                status="success",
-                message=message,
-                symbol=symbol,
-                records_ingested=records_ingested,
-                duplicates_skipped=duplicates_skipped
-            )
+        Raises:
+            TradeIngestionError: If any batch is empty or ingestion fails
+        """
+        if not batches or not all(batches):
+            raise TradeIngestionError("No trades provided for ingestion")
+        
+        try:
+            results = self.repository.ingest_trade_batches(batches)
+            return [
+                self._build_ingest_response(trades[0].symbol, records_ingested, duplicates_skipped)
+                for trades, (records_ingested, duplicates_skipped) in zip(batches, results)
+            ]
         except Exception as e:
             raise TradeIngestionError(f"Failed to ingest trades: {str(e)}") from e
     
+    @staticmethod
+    def _build_ingest_response(
+        symbol: str,
+        records_ingested: int,
+        duplicates_skipped: int
+    ) -> TradeIngestResponse:
+        """Build the ingestion response for a single request."""
+        if records_ingested == 0 and duplicates_skipped > 0:
+            message = f"All {duplicates_skipped} trades were duplicates and skipped"
+        elif duplicates_skipped > 0:
+            message = f"Ingested {records_ingested} trades, skipped {duplicates_skipped} duplicates"
+        else:
+            message = f"Successfully ingested {records_ingested} trades"
+        
+        return TradeIngestResponse(
+            status="success",
+            message=message,
+            symbol=symbol,
+            records_ingested=records_ingested,
+            duplicates_skipped=duplicates_skipped
+        )
+    
     def get_ohlcv_stats(
         self,
         symbol: str,
@@ -103,6 +140,66 @@ class TradeService:
         Returns:
             OHLCVResponse with aggregated data
             
+        Raises:
+            DataNotFoundError: If symbol or data not found
+        """
+        aggregated_df = self._get_aggregated(symbol, start, end, interval)
+        
+        # Convert to response model; skip re-validating values computed internally
+        records = [
+            OHLCVRecord.model_construct(
+                timestamp=timestamp,
+                open=open_,
+                high=high,
+                low=low,
+                close=close,
+                volume=volume
+            )
+            for timestamp, open_, high, low, close, volume in self._iter_bars(aggregated_df)
+        ]
+        
+        return OHLCVResponse(
+            symbol=symbol.upper(),
+            interval=interval.value,
+            data=records
+        )
+    
+    def iter_ohlcv_stats(
+        self,
+        symbol: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        interval: IntervalEnum = IntervalEnum.ONE_MIN
+    ) -> Iterator[bytes]:
+        """
+        Get aggregated OHLCV statistics for a symbol as NDJSON lines.
+        
+        Args:
+            symbol: Trading symbol to query
+            start: Optional start of time range
+            end: Optional end of time range
+            interval: Aggregation interval
+            
+        Returns:
+            Iterator yielding one JSON-encoded OHLCV record per line
+            
+        Raises:
+            DataNotFoundError: If symbol or data not found (raised before
+                iteration starts)
+        """
+        aggregated_df = self._get_aggregated(symbol, start, end, interval)
+        return self._iter_ndjson(aggregated_df)
+    
+    def _get_aggregated(
+        self,
+        symbol: str,
+        start: Optional[datetime],
+        end: Optional[datetime],
+        interval: IntervalEnum
+    ) -> pd.DataFrame:
+        """
+        Fetch and aggregate a symbol's data for the OHLCV endpoints.
+        
         Raises:
             DataNotFoundError: If symbol or data not found
         """
@@ -119,27 +216,38 @@ class TradeService:
             )
         
         # Aggregate data by interval
-        aggregated_df = self._aggregate_ohlcv(df, interval)
-        
-        # Convert to response model
-        records = [
-            OHLCVRecord(
-                timestamp=row.name,
-                open=row["open"],
-                high=row["high"],
-                low=row["low"],
-                close=row["close"],
-                volume=int(row["volume"])
-            )
-            for _, row in aggregated_df.iterrows()
-        ]
+        return self._aggregate_ohlcv(df, interval)
+    
+    @staticmethod
+    def _iter_bars(aggregated_df: pd.DataFrame) -> Iterator[tuple]:
+        """
+        Iterate (timestamp, open, high, low, close, volume) tuples of native values.
         
-        return OHLCVResponse(
-            symbol=symbol.upper(),
-            interval=interval.value,
-            data=records
+        Walks plain column lists rather than iterrows().
+        """
+        return zip(
+            aggregated_df.index.to_pydatetime().tolist(),
+            aggregated_df["open"].to_numpy().tolist(),
+            aggregated_df["high"].to_numpy().tolist(),
+            aggregated_df["low"].to_numpy().tolist(),
+            aggregated_df["close"].to_numpy().tolist(),
+            aggregated_df["volume"].to_numpy(dtype="int64").tolist(),
         )
     
+    @classmethod
+    def _iter_ndjson(cls, aggregated_df: pd.DataFrame) -> Iterator[bytes]:
+        """Encode each aggregated bar as one NDJSON line, as it is reached."""
+        for timestamp, open_, high, low, close, volume in cls._iter_bars(aggregated_df):
+            record = {
+                "timestamp": timestamp,
+                "open": open_,
+                "high": high,
+                "low": low,
+                "close": close,
+                "volume": volume,
+            }
+            yield orjson.dumps(record, option=orjson.OPT_UTC_Z | orjson.OPT_APPEND_NEWLINE)
+    
     def _aggregate_ohlcv(
         self, 
         df: pd.DataFrame, 
@@ -149,31 +257,113 @@ class TradeService:
         Aggregate OHLCV data to the specified interval.
         
         Args:
-            df: DataFrame with OHLCV data
+            df: DataFrame with OHLCV data and int64 nanosecond timestamps
             interval: Target aggregation interval
             
         Returns:
-            Aggregated DataFrame
+            Aggregated DataFrame indexed by UTC timestamp
         """
-        # Set timestamp as index for resampling
-        df = df.set_index("timestamp")
-        
-        # Get pandas frequency string
-        freq = self.INTERVAL_MAP[interval]
-        
-        # Resample and aggregate
-        aggregated = df.resample(freq).agg({
-            "open": "first",
-            "high": "max",
-            "low": "min",
-            "close": "last",
-            "volume": "sum"
-        })
+        bucket_ns = BUCKET_NS[interval]
+        kernel = ohlcv_bars
+        if NUMBA_AVAILABLE and len(df):
+            # Rows are sorted, so the bucket span bounds the number of bars
+            timestamps = df["timestamp"]
+            span = timestamps.iat[-1] // bucket_ns - timestamps.iat[0] // bucket_ns + 1
+            if len(df) < self.KERNEL_MAX_ROWS_PER_BAR * span:
+                kernel = ohlcv_bucket
+        return self._aggregate_ohlcv_kernel(df, bucket_ns, kernel)
+    
+    @staticmethod
+    def _aggregate_ohlcv_kernel(
+        df: pd.DataFrame,
+        bucket_ns: int,
+        kernel: Callable = ohlcv_bucket
+    ) -> pd.DataFrame:
+        """Aggregate rows with one of the kernels into a frame indexed by UTC timestamp."""
+        timestamps, open_, high, low, close, volume = kernel(
+            df["timestamp"].to_numpy(dtype="int64"),
+            df["open"].to_numpy(dtype="float64"),
+            df["high"].to_numpy(dtype="float64"),
+            df["low"].to_numpy(dtype="float64"),
+            df["close"].to_numpy(dtype="float64"),
+            df["volume"].to_numpy(dtype="int64"),
+            bucket_ns,
+        )
+        return pd.DataFrame(
+            {"open": open_, "high": high, "low": low, "close": close, "volume": volume},
+            index=pd.to_datetime(timestamps, unit="ns", utc=True).rename("timestamp")
+        )
+
+
+class IngestBatcher:
+    """
+    Coalesces concurrent ingest requests into a single storage write.
+    
+    Requests are queued; a background task waits briefly for more to
+    arrive, ingests everything queued (up to max_trades) in one call on a
+    worker thread and resolves each request's future with its own response.
+    """
+    
+    def __init__(self, max_delay: float = 0.005, max_trades: int = 10_000):
+        """Initialize batcher with the drain delay (seconds) and batch size cap."""
+        self.max_delay = max_delay
+        self.max_trades = max_trades
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def submit(self, trades: List[TradeEvent]) -> TradeIngestResponse:
+        """
+        Queue trades for the next batched write and wait for the result.
         
-        # Remove rows with NaN values (empty intervals)
-        aggregated = aggregated.dropna()
+        Raises:
+            TradeIngestionError: If ingestion fails
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((trades, future))
+        return await future
+    
+    def _ensure_worker(self) -> None:
+        """Start the drain task on the running loop if it isn't running there."""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._drain())
+    
+    async def _drain(self) -> None:
+        """Repeatedly collect queued requests and ingest them together."""
+        while True:
+            items = [await self._queue.get()]
+            # Give concurrent requests a moment to join this batch
+            await asyncio.sleep(self.max_delay)
+            queued_trades = len(items[0][0])
+            while not self._queue.empty() and queued_trades < self.max_trades:
+                item = self._queue.get_nowait()
+                items.append(item)
+                queued_trades += len(item[0])
+            
+            await self._ingest(items)
+    
+    @staticmethod
+    async def _ingest(items: List[Tuple[List[TradeEvent], asyncio.Future]]) -> None:
+        """Ingest one batch of queued requests and resolve their futures."""
+        service = get_trade_service()
+        try:
+            responses = await asyncio.to_thread(
+                service.ingest_trade_batches,
+                [trades for trades, _ in items]
+            )
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
         
-        return aggregated
+        for (_, future), response in zip(items, responses):
+            if not future.done():
+                future.set_result(response)
 
 
 # Service instance for dependency injection
@@ -188,9 +378,20 @@ def get_trade_service() -> TradeService:
     return _service_instance
 
 
-def reset_trade_service(repository: Optional[CSVRepository] = None) -> TradeService:
+def reset_trade_service(repository: Optional[BaseRepository] = None) -> TradeService:
     """Reset trade service instance (useful for testing)."""
     global _service_instance
     _service_instance = TradeService(repository)
     return _service_instance
 
+
+# Batcher instance shared by ingest requests
+_batcher_instance: Optional[IngestBatcher] = None
+
+
+def get_ingest_batcher() -> IngestBatcher:
+    """Get or create the ingest batcher singleton."""
+    global _batcher_instance
+    if _batcher_instance is None:
+        _batcher_instance = IngestBatcher()
+    return _batcher_instance
@@ -2,6 +2,19 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add parent directory to path so tests can import modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+
+@pytest.fixture(scope="session", autouse=True)
+def _warmup():
+    """Warm up the app (OpenAPI schema, first request) before any test runs."""
+    from fastapi.testclient import TestClient
+
+    from main import app
+
+    # Cached on the app (app.openapi_schema) after the first call
+    app.openapi()
+    TestClient(app).get("/health")
@@ -1,41 +1,106 @@
 """Integration tests for FastAPI endpoints."""
+import asyncio
+import json
+import httpx
+import orjson
 import pytest
-import tempfile
-from pathlib import Path
 from datetime import datetime
 
 from fastapi.testclient import TestClient
 
+import repository
 from main import app
-from repository import reset_repository
+from repository import CSVRepository, reset_repository
 from services import reset_trade_service
 
 
+# Headers for posting pre-encoded JSON bodies
+JSON_HEADERS = {"content-type": "application/json"}
+
+# A valid AAPL trade; tests derive invalid variants from it
+AAPL_TRADE = {
+    "timestamp": "2025-01-02T09:30:00Z",
+    "symbol": "AAPL",
+    "price": 190.50,
+    "volume": 1200000
+}
+
+# Three AAPL trades a minute apart, encoded once at import
+SAMPLE_PAYLOAD_BYTES = orjson.dumps({
+    "trades": [
+        {
+            "timestamp": "2025-01-02T09:30:00Z",
+            "symbol": "AAPL",
+            "price": 190.50,
+            "volume": 1200000
+        },
+        {
+            "timestamp": "2025-01-02T09:31:00Z",
+            "symbol": "AAPL",
+            "price": 191.10,
+            "volume": 850000
+        },
+        {
+            "timestamp": "2025-01-02T09:32:00Z",
+            "symbol": "AAPL",
+            "price": 191.30,
+            "volume": 640000
+        }
+    ]
+})
+
+
+def post_json(client, path, obj):
+    """POST an object as orjson-encoded JSON (awaitable when client is an AsyncClient)."""
+    return client.post(path, content=orjson.dumps(obj), headers=JSON_HEADERS)
+
+
+@pytest.fixture(scope="module")
+def aapl_payload_bytes():
+    """Ingest payload holding the single AAPL trade, encoded once per module."""
+    return orjson.dumps({"trades": [AAPL_TRADE]})
+
+
+@pytest.fixture(scope="module")
+def client():
+    """Create one test client shared by every test in the module."""
+    return TestClient(app)
+
+
 @pytest.fixture
-def temp_csv():
-    """Create a temporary CSV file for testing."""
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.csv', delete=False) as f:
-        temp_path = Path(f.name)
-    yield temp_path
-    # Cleanup
-    if temp_path.exists():
-        temp_path.unlink()
+def anyio_backend():
+    """Run async tests on asyncio only."""
+    return "asyncio"
 
 
 @pytest.fixture
-def client(temp_csv):
-    """Create test client with isolated repository."""
-    # Reset repository with fresh temp file
-    repo = reset_repository(temp_csv)
+async def async_client():
+    """Async client calling the app in-process, for tests that overlap requests."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def _reset():
+    """Give each test an isolated in-memory repository."""
+    repo = reset_repository(None)
     repo.clear_data()  # Ensure fresh state
     reset_trade_service(repo)
     
-    yield TestClient(app)
+    yield
     
     # Cleanup after test
     repo.clear_data()
 
 
+@pytest.fixture
+def sample_ingested(client):
+    """Client with the sample AAPL trades ingested."""
+    client.post("/v1/trades/ingest", content=SAMPLE_PAYLOAD_BYTES, headers=JSON_HEADERS)
+    return client
+
+
 class TestHealthEndpoint:
     """Tests for health check endpoint."""
     
@@ -46,22 +111,54 @@ class TestHealthEndpoint:
         assert response.json() == {"status": "healthy"}
 
 
+class TestOpenAPI:
+    """Tests for the published OpenAPI document."""
+    
+    def test_ingest_body_schema_published(self, client):
+        """Test that the hand-parsed ingest body references its component schemas."""
+        schema = client.get("/openapi.json").json()
+        body = schema["paths"]["/v1/trades/ingest"]["post"]["requestBody"]
+        assert body["content"]["application/json"]["schema"] == {
+            "$ref": "#/components/schemas/TradeIngestRequest"
+        }
+        assert {"TradeIngestRequest", "TradeEvent"} <= set(schema["components"]["schemas"])
+
+
+class TestShutdown:
+    """Tests for application shutdown."""
+    
+    def test_buffered_trades_written_on_shutdown(self, tmp_path, monkeypatch, aapl_payload_bytes):
+        """Test that rows still buffered by a CSV repository reach the file at shutdown."""
+        monkeypatch.setattr(CSVRepository, "FLUSH_INTERVAL", 3600)
+        csv_path = tmp_path / "trades.csv"
+        reset_trade_service(reset_repository(csv_path))
+        
+        with TestClient(app) as client:
+            client.post("/v1/trades/ingest", content=aapl_payload_bytes, headers=JSON_HEADERS)
+            assert len(csv_path.read_text().splitlines()) == 1
+        
+        assert len(csv_path.read_text().splitlines()) == 2
+    
+    def test_shutdown_does_not_create_repository(self, tmp_path, monkeypatch):
+        """Test that shutting down without a repository leaves the default CSV alone."""
+        monkeypatch.setattr(repository, "_repository_instance", None)
+        monkeypatch.setattr(CSVRepository, "DEFAULT_CSV_PATH", tmp_path / "trades.csv")
+        
+        with TestClient(app):
+            pass
+        
+        assert repository._repository_instance is None
+        assert not (tmp_path / "trades.csv").exists()
+
+
 class TestIngestEndpoint:
     """Integration tests for POST /v1/trades/ingest."""
     
-    def test_successful_ingestion_single_trade(self, client):
+    def test_successful_ingestion_single_trade(self, client, aapl_payload_bytes):
         """Test successful ingestion of a single trade."""
-        payload = {
-            "trades": [
-                {
-                    "timestamp": "2025-01-02T09:30:00Z",
-                    "symbol": "AAPL",
-                    "price": 190.50,
-                    "volume": 1200000
-                }
-            ]
-        }
-        response = client.post("/v1/trades/ingest", json=payload)
+        response = client.post(
+            "/v1/trades/ingest", content=aapl_payload_bytes, headers=JSON_HEADERS
+        )
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "success"
@@ -87,30 +184,24 @@ class TestIngestEndpoint:
                 }
             ]
         }
-        response = client.post("/v1/trades/ingest", json=payload)
+        response = post_json(client, "/v1/trades/ingest", payload)
         assert response.status_code == 200
         data = response.json()
         assert data["records_ingested"] == 2
     
-    def test_duplicate_detection(self, client):
+    def test_duplicate_detection(self, client, aapl_payload_bytes):
         """Test that duplicate trades are detected and skipped."""
-        payload = {
-            "trades": [
-                {
-                    "timestamp": "2025-01-02T09:30:00Z",
-                    "symbol": "AAPL",
-                    "price": 190.50,
-                    "volume": 1200000
-                }
-            ]
-        }
         # First ingestion
-        response1 = client.post("/v1/trades/ingest", json=payload)
+        response1 = client.post(
+            "/v1/trades/ingest", content=aapl_payload_bytes, headers=JSON_HEADERS
+        )
         assert response1.status_code == 200
         assert response1.json()["records_ingested"] == 1
         
         # Second ingestion (duplicate)
-        response2 = client.post("/v1/trades/ingest", json=payload)
+        response2 = client.post(
+            "/v1/trades/ingest", content=aapl_payload_bytes, headers=JSON_HEADERS
+        )
         assert response2.status_code == 200
         assert response2.json()["records_ingested"] == 0
         assert response2.json()["duplicates_skipped"] == 1
@@ -118,7 +209,7 @@ class TestIngestEndpoint:
     def test_empty_trades_list_rejected(self, client):
         """Test that empty trades list is rejected."""
         payload = {"trades": []}
-        response = client.post("/v1/trades/ingest", json=payload)
+        response = post_json(client, "/v1/trades/ingest", payload)
         assert response.status_code == 422
     
     def test_inconsistent_symbols_rejected(self, client):
@@ -139,87 +230,57 @@ class TestIngestEndpoint:
                 }
             ]
         }
-        response = client.post("/v1/trades/ingest", json=payload)
+        response = post_json(client, "/v1/trades/ingest", payload)
         assert response.status_code == 422
     
-    def test_invalid_price_rejected(self, client):
-        """Test that invalid price is rejected."""
-        payload = {
-            "trades": [
-                {
-                    "timestamp": "2025-01-02T09:30:00Z",
-                    "symbol": "AAPL",
-                    "price": -10.0,
-                    "volume": 1200000
-                }
-            ]
-        }
-        response = client.post("/v1/trades/ingest", json=payload)
+    @pytest.mark.parametrize(
+        "trade",
+        [
+            {**AAPL_TRADE, "price": -10.0},
+            {key: value for key, value in AAPL_TRADE.items() if key != "volume"},
+            {**AAPL_TRADE, "timestamp": "not-a-date"},
+            {**AAPL_TRADE, "timestamp": "2300-01-01T00:00:00Z"},
+            {**AAPL_TRADE, "volume": 2**63},
+        ],
+        ids=[
+            "invalid_price",
+            "missing_required_field",
+            "invalid_timestamp",
+            "timestamp_out_of_range",
+            "volume_out_of_range",
+        ],
+    )
+    def test_invalid_trade_rejected(self, client, trade):
+        """Test that a trade with a bad or missing field is rejected."""
+        response = post_json(client, "/v1/trades/ingest", {"trades": [trade]})
         assert response.status_code == 422
     
-    def test_missing_required_field_rejected(self, client):
-        """Test that missing required field is rejected."""
-        payload = {
-            "trades": [
-                {
-                    "timestamp": "2025-01-02T09:30:00Z",
-                    "symbol": "AAPL",
-                    "price": 190.50
-                    # volume missing
-                }
-            ]
-        }
-        response = client.post("/v1/trades/ingest", json=payload)
+    @pytest.mark.parametrize(
+        "headers",
+        [{"Content-Type": "text/plain"}, {}],
+        ids=["text_plain", "no_content_type"],
+    )
+    def test_non_json_content_type_rejected(self, client, aapl_payload_bytes, headers):
+        """Test that a JSON body not declared as JSON is not ingested."""
+        response = client.post("/v1/trades/ingest", content=aapl_payload_bytes, headers=headers)
         assert response.status_code == 422
+        assert response.json()["detail"][0]["type"] == "model_attributes_type"
     
-    def test_invalid_timestamp_rejected(self, client):
-        """Test that invalid timestamp format is rejected."""
-        payload = {
-            "trades": [
-                {
-                    "timestamp": "not-a-date",
-                    "symbol": "AAPL",
-                    "price": 190.50,
-                    "volume": 1200000
-                }
-            ]
-        }
-        response = client.post("/v1/trades/ingest", json=payload)
+    def test_empty_body_rejected(self, client):
+        """Test that an empty body is reported as missing."""
+        response = client.post("/v1/trades/ingest", content=b"", headers=JSON_HEADERS)
         assert response.status_code == 422
+        assert response.json()["detail"] == [
+            {"type": "missing", "loc": ["body"], "msg": "Field required", "input": None}
+        ]
 
 
 class TestOHLCVEndpoint:
     """Integration tests for GET /v1/stats/ohlc."""
     
-    def _ingest_sample_data(self, client):
-        """Helper to ingest sample trade data."""
-        payload = {
-            "trades": [
-                {
-                    "timestamp": "2025-01-02T09:30:00Z",
-                    "symbol": "AAPL",
-                    "price": 190.50,
-                    "volume": 1200000
-                },
-                {
-                    "timestamp": "2025-01-02T09:31:00Z",
-                    "symbol": "AAPL",
-                    "price": 191.10,
-                    "volume": 850000
-                },
-                {
-                    "timestamp": "2025-01-02T09:32:00Z",
-                    "symbol": "AAPL",
-                    "price": 191.30,
-                    "volume": 640000
-                }
-            ]
-        }
-        client.post("/v1/trades/ingest", json=payload)
-    
-    def test_get_ohlcv_success(self, client):
+    def test_get_ohlcv_success(self, sample_ingested):
         """Test successful OHLCV retrieval."""
-        self._ingest_sample_data(client)
+        client = sample_ingested
         
         response = client.get("/v1/stats/ohlc", params={"symbol": "AAPL"})
         assert response.status_code == 200
@@ -228,9 +289,9 @@ class TestOHLCVEndpoint:
         assert data["interval"] == "1min"
         assert len(data["data"]) == 3
     
-    def test_get_ohlcv_with_time_range(self, client):
+    def test_get_ohlcv_with_time_range(self, sample_ingested):
         """Test OHLCV retrieval with time range."""
-        self._ingest_sample_data(client)
+        client = sample_ingested
         
         response = client.get(
             "/v1/stats/ohlc",
@@ -244,9 +305,9 @@ class TestOHLCVEndpoint:
         data = response.json()
         assert len(data["data"]) == 2
     
-    def test_get_ohlcv_with_5min_interval(self, client):
+    def test_get_ohlcv_with_5min_interval(self, sample_ingested):
         """Test OHLCV retrieval with 5-minute aggregation."""
-        self._ingest_sample_data(client)
+        client = sample_ingested
         
         response = client.get(
             "/v1/stats/ohlc",
@@ -275,22 +336,52 @@ class TestOHLCVEndpoint:
         response = client.get("/v1/stats/ohlc")
         assert response.status_code == 422
     
-    def test_get_ohlcv_invalid_interval_422(self, client):
-        """Test that invalid interval returns 422."""
-        self._ingest_sample_data(client)
+    @pytest.mark.parametrize(
+        "params,expected_status",
+        [
+            ({"symbol": "AAPL", "interval": "invalid"}, 422),
+            (
+                {"symbol": "AAPL", "start": "2025-01-02T17:00:00Z", "end": "2025-01-02T09:00:00Z"},
+                400
+            ),
+            (
+                {"symbol": "AAPL", "start": "2025-01-03T09:00:00Z", "end": "2025-01-03T17:00:00Z"},
+                404
+            ),
+        ],
+        ids=["invalid_interval", "invalid_date_range", "no_data_in_range"],
+    )
+    def test_get_ohlcv_rejected(self, sample_ingested, params, expected_status):
+        """Test bad intervals (422), inverted ranges (400) and empty ranges (404) for a known symbol."""
+        response = sample_ingested.get("/v1/stats/ohlc", params=params)
+        assert response.status_code == expected_status
+
+
+class TestOHLCVStreamEndpoint:
+    """Integration tests for GET /v1/stats/ohlc.ndjson."""
+    
+    def test_stream_matches_json_endpoint(self, sample_ingested):
+        """Test that streamed records match the JSON endpoint's records."""
+        client = sample_ingested
+        params = {"symbol": "AAPL", "interval": "1min"}
         
-        response = client.get(
-            "/v1/stats/ohlc",
-            params={"symbol": "AAPL", "interval": "invalid"}
-        )
-        assert response.status_code == 422
+        response = client.get("/v1/stats/ohlc.ndjson", params=params)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        records = [json.loads(line) for line in response.text.splitlines()]
+        
+        expected = client.get("/v1/stats/ohlc", params=params).json()["data"]
+        assert records == expected
     
-    def test_get_ohlcv_invalid_date_range_400(self, client):
+    def test_stream_unknown_symbol_404(self, client):
+        """Test that unknown symbol returns 404 before streaming starts."""
+        response = client.get("/v1/stats/ohlc.ndjson", params={"symbol": "UNKNOWN"})
+        assert response.status_code == 404
+    
+    def test_stream_invalid_date_range_400(self, client):
         """Test that start after end returns 400."""
-        self._ingest_sample_data(client)
-        
         response = client.get(
-            "/v1/stats/ohlc",
+            "/v1/stats/ohlc.ndjson",
             params={
                 "symbol": "AAPL",
                 "start": "2025-01-02T17:00:00Z",
@@ -298,26 +389,13 @@ class TestOHLCVEndpoint:
             }
         )
         assert response.status_code == 400
-    
-    def test_get_ohlcv_no_data_in_range_404(self, client):
-        """Test that no data in time range returns 404."""
-        self._ingest_sample_data(client)
-        
-        response = client.get(
-            "/v1/stats/ohlc",
-            params={
-                "symbol": "AAPL",
-                "start": "2025-01-03T09:00:00Z",
-                "end": "2025-01-03T17:00:00Z"
-            }
-        )
-        assert response.status_code == 404
 
 
 class TestEndToEndWorkflow:
     """End-to-end workflow tests."""
     
-    def test_ingest_then_query_workflow(self, client):
+    @pytest.mark.anyio
+    async def test_ingest_then_query_workflow(self, async_client):
         """Test complete workflow: ingest trades, then query OHLCV."""
         # Step 1: Ingest trades
         ingest_payload = {
@@ -336,20 +414,20 @@ class TestEndToEndWorkflow:
                 }
             ]
         }
-        ingest_response = client.post("/v1/trades/ingest", json=ingest_payload)
+        ingest_response = await post_json(async_client, "/v1/trades/ingest", ingest_payload)
         assert ingest_response.status_code == 200
         
         # Step 2: Query OHLCV
-        ohlcv_response = client.get("/v1/stats/ohlc", params={"symbol": "AAPL"})
+        ohlcv_response = await async_client.get("/v1/stats/ohlc", params={"symbol": "AAPL"})
         assert ohlcv_response.status_code == 200
         
         data = ohlcv_response.json()
         assert data["symbol"] == "AAPL"
         assert len(data["data"]) == 2
     
-    def test_multiple_symbols_workflow(self, client):
+    @pytest.mark.anyio
+    async def test_multiple_symbols_workflow(self, async_client):
         """Test ingesting and querying multiple symbols."""
-        # Ingest AAPL trades
         aapl_payload = {
             "trades": [
                 {
@@ -360,9 +438,6 @@ class TestEndToEndWorkflow:
                 }
             ]
         }
-        client.post("/v1/trades/ingest", json=aapl_payload)
-        
-        # Ingest MSFT trades
         msft_payload = {
             "trades": [
                 {
@@ -373,15 +448,20 @@ class TestEndToEndWorkflow:
                 }
             ]
         }
-        client.post("/v1/trades/ingest", json=msft_payload)
         
-        # Query AAPL
-        aapl_response = client.get("/v1/stats/ohlc", params={"symbol": "AAPL"})
+        # The symbols are independent, so both ingests are in flight at once
+        ingest_responses = await asyncio.gather(
+            post_json(async_client, "/v1/trades/ingest", aapl_payload),
+            post_json(async_client, "/v1/trades/ingest", msft_payload),
+        )
+        assert [response.status_code for response in ingest_responses] == [200, 200]
+        
+        # Query both symbols concurrently
+        aapl_response, msft_response = await asyncio.gather(
+            async_client.get("/v1/stats/ohlc", params={"symbol": "AAPL"}),
+            async_client.get("/v1/stats/ohlc", params={"symbol": "MSFT"}),
+        )
         assert aapl_response.status_code == 200
         assert aapl_response.json()["symbol"] == "AAPL"
-        
-        # Query MSFT
-        msft_response = client.get("/v1/stats/ohlc", params={"symbol": "MSFT"})
         assert msft_response.status_code == 200
         assert msft_response.json()["symbol"] == "MSFT"
-
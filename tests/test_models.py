@@ -1,6 +1,6 @@
 """Unit tests for Pydantic models."""
 import pytest
-from datetime import datetime
+from datetime import datetime, timezone
 from pydantic import ValidationError
 
 from models import (
@@ -11,17 +11,34 @@ from models import (
 )
 
 
+@pytest.fixture(scope="module")
+def aapl_trade():
+    """A validated AAPL trade, shared because trade events are immutable."""
+    return TradeEvent(
+        timestamp=datetime(2025, 1, 2, 9, 30, 0),
+        symbol="AAPL",
+        price=190.50,
+        volume=1200000
+    )
+
+
+@pytest.fixture(scope="module")
+def msft_trade():
+    """A validated MSFT trade, shared because trade events are immutable."""
+    return TradeEvent(
+        timestamp=datetime(2025, 1, 2, 9, 31, 0),
+        symbol="MSFT",
+        price=410.50,
+        volume=730000
+    )
+
+
 class TestTradeEvent:
     """Tests for TradeEvent model."""
     
-    def test_valid_trade_event(self):
+    def test_valid_trade_event(self, aapl_trade):
         """Test creating a valid trade event."""
-        trade = TradeEvent(
-            timestamp=datetime(2025, 1, 2, 9, 30, 0),
-            symbol="AAPL",
-            price=190.50,
-            volume=1200000
-        )
+        trade = aapl_trade
         assert trade.symbol == "AAPL"
         assert trade.price == 190.50
         assert trade.volume == 1200000
@@ -55,7 +72,7 @@ class TestTradeEvent:
                 price=0,
                 volume=1200000
             )
-        assert "greater than 0" in str(exc_info.value).lower()
+        assert exc_info.value.errors()[0]["type"] == "greater_than"
     
     def test_invalid_price_negative(self):
         """Test that negative price is rejected."""
@@ -87,6 +104,40 @@ class TestTradeEvent:
                 volume=-100
             )
     
+    def test_invalid_volume_too_large(self):
+        """Test that volume beyond the int64 storage range is rejected."""
+        with pytest.raises(ValidationError):
+            TradeEvent(
+                timestamp=datetime(2025, 1, 2, 9, 30, 0),
+                symbol="AAPL",
+                price=190.50,
+                volume=2**63
+            )
+    
+    @pytest.mark.parametrize(
+        "timestamp",
+        [
+            datetime(1600, 1, 1),
+            datetime(2300, 1, 1),
+            datetime(2300, 1, 1, tzinfo=timezone.utc),
+        ],
+        ids=["before_range", "after_range", "after_range_aware"],
+    )
+    def test_timestamp_out_of_range(self, timestamp):
+        """Test that timestamps outside the nanosecond storage range are rejected."""
+        with pytest.raises(ValidationError):
+            TradeEvent(
+                timestamp=timestamp,
+                symbol="AAPL",
+                price=190.50,
+                volume=1200000
+            )
+    
+    def test_trade_event_immutable(self, aapl_trade):
+        """Test that trade events cannot be modified after validation."""
+        with pytest.raises(ValidationError):
+            aapl_trade.price = 0
+    
     def test_missing_required_field(self):
         """Test that missing required fields raise validation error."""
         with pytest.raises(ValidationError):
@@ -101,66 +152,34 @@ class TestTradeEvent:
 class TestTradeIngestRequest:
     """Tests for TradeIngestRequest model."""
     
-    def test_valid_request_single_trade(self):
+    def test_valid_request_single_trade(self, aapl_trade):
         """Test valid request with single trade."""
-        request = TradeIngestRequest(
-            trades=[
-                TradeEvent(
-                    timestamp=datetime(2025, 1, 2, 9, 30, 0),
-                    symbol="AAPL",
-                    price=190.50,
-                    volume=1200000
-                )
-            ]
-        )
+        request = TradeIngestRequest(trades=[aapl_trade])
         assert len(request.trades) == 1
     
-    def test_valid_request_multiple_trades_same_symbol(self):
+    def test_valid_request_multiple_trades_same_symbol(self, aapl_trade):
         """Test valid request with multiple trades of same symbol."""
-        request = TradeIngestRequest(
-            trades=[
-                TradeEvent(
-                    timestamp=datetime(2025, 1, 2, 9, 30, 0),
-                    symbol="AAPL",
-                    price=190.50,
-                    volume=1200000
-                ),
-                TradeEvent(
-                    timestamp=datetime(2025, 1, 2, 9, 31, 0),
-                    symbol="AAPL",
-                    price=191.00,
-                    volume=850000
-                )
-            ]
-        )
+        later = aapl_trade.model_copy(update={
+            "timestamp": datetime(2025, 1, 2, 9, 31, 0),
+            "price": 191.00,
+            "volume": 850000
+        })
+        request = TradeIngestRequest(trades=[aapl_trade, later])
         assert len(request.trades) == 2
     
     def test_empty_trades_list_rejected(self):
         """Test that empty trades list is rejected."""
         with pytest.raises(ValidationError) as exc_info:
             TradeIngestRequest(trades=[])
-        assert "min_length" in str(exc_info.value).lower() or "at least" in str(exc_info.value).lower()
+        assert exc_info.value.errors()[0]["type"] == "too_short"
     
-    def test_inconsistent_symbols_rejected(self):
+    def test_inconsistent_symbols_rejected(self, aapl_trade, msft_trade):
         """Test that trades with different symbols are rejected."""
         with pytest.raises(ValidationError) as exc_info:
-            TradeIngestRequest(
-                trades=[
-                    TradeEvent(
-                        timestamp=datetime(2025, 1, 2, 9, 30, 0),
-                        symbol="AAPL",
-                        price=190.50,
-                        volume=1200000
-                    ),
-                    TradeEvent(
-                        timestamp=datetime(2025, 1, 2, 9, 31, 0),
-                        symbol="MSFT",
-                        price=410.50,
-                        volume=730000
-                    )
-                ]
-            )
-        assert "same symbol" in str(exc_info.value).lower()
+            TradeIngestRequest(trades=[aapl_trade, msft_trade])
+        errors = exc_info.value.errors()
+        assert errors[0]["type"] == "value_error"
+        assert "same symbol" in errors[0]["msg"]
 
 
 class TestOHLCVQueryParams:
@@ -196,7 +215,9 @@ class TestOHLCVQueryParams:
                 start=datetime(2025, 1, 2, 17, 0, 0),
                 end=datetime(2025, 1, 2, 9, 0, 0)
             )
-        assert "before end" in str(exc_info.value).lower()
+        errors = exc_info.value.errors()
+        assert errors[0]["type"] == "value_error"
+        assert "before end" in errors[0]["msg"]
     
     def test_valid_intervals(self):
         """Test all valid interval values."""
@@ -0,0 +1,250 @@
+"""Unit tests for the CSV repository."""
+import gc
+import pytest
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import repository
+from models import TradeEvent
+from repository import CSVRepository, InMemoryRepository, reset_repository
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    """Path to a fresh CSV file for a repository."""
+    return tmp_path / "trades.csv"
+
+
+def _trade(minute: int, price: float = 190.50, volume: int = 1200000) -> TradeEvent:
+    """Build an AAPL trade at 09:<minute> UTC."""
+    return TradeEvent(
+        timestamp=datetime(2025, 1, 2, 9, minute, 0, tzinfo=timezone.utc),
+        symbol="AAPL",
+        price=price,
+        volume=volume
+    )
+
+
+class TestIdempotency:
+    """Tests for duplicate detection."""
+
+    def test_duplicates_skipped_within_instance(self, csv_path):
+        """Test that re-ingesting the same trades is a no-op."""
+        repo = CSVRepository(csv_path)
+        assert repo.ingest_trades([_trade(30), _trade(31)]) == (2, 0)
+        assert repo.ingest_trades([_trade(30), _trade(32)]) == (1, 1)
+
+    def test_duplicates_skipped_after_reload(self, csv_path):
+        """Test that keys of persisted trades are reloaded from disk."""
+        writer = CSVRepository(csv_path)
+        writer.ingest_trades([_trade(30), _trade(31)])
+        writer.flush()
+
+        repo = CSVRepository(csv_path)
+        assert repo.ingest_trades([_trade(30), _trade(31)]) == (0, 2)
+        assert repo.ingest_trades([_trade(31, price=191.10)]) == (1, 0)
+
+    def test_same_instant_in_other_offset_is_duplicate(self, csv_path):
+        """Test that keys compare instants, not how the timestamp was written."""
+        repo = CSVRepository(csv_path)
+        repo.ingest_trades([_trade(30)])
+        eastern = _trade(30).timestamp.astimezone(timezone(timedelta(hours=-5)))
+        trade = TradeEvent(timestamp=eastern, symbol="AAPL", price=190.50, volume=1200000)
+        assert repo.ingest_trades([trade]) == (0, 1)
+
+    def test_batches_deduplicated_in_order(self, csv_path):
+        """Test that a trade repeated across batches counts once, in the first batch."""
+        repo = CSVRepository(csv_path)
+        results = repo.ingest_trade_batches([[_trade(30), _trade(31)], [_trade(31), _trade(32)]])
+        assert results == [(2, 0), (1, 1)]
+        repo.flush()
+        assert len(CSVRepository(csv_path).get_data_by_symbol("AAPL")) == 3
+
+    def test_mixed_symbol_batch_rejected(self, csv_path):
+        """Test that a batch mixing symbols raises and stores nothing."""
+        repo = CSVRepository(csv_path)
+        msft = TradeEvent(timestamp=_trade(31).timestamp, symbol="MSFT", price=410.50, volume=730000)
+        with pytest.raises(ValueError):
+            repo.ingest_trade_batches([[_trade(30)], [_trade(32), msft]])
+
+        repo.flush()
+        assert not repo.symbol_exists("AAPL")
+        assert not repo.symbol_exists("MSFT")
+        assert len(csv_path.read_text().splitlines()) == 1
+        assert repo.ingest_trades([_trade(30)]) == (1, 0)
+
+    def test_concurrent_duplicates_ingested_once(self, csv_path):
+        """Test that the same trades ingested from several threads are stored once."""
+        repo = CSVRepository(csv_path)
+        trades = [_trade(minute) for minute in range(30, 40)]
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(repo.ingest_trades, [trades] * 8))
+
+        assert sum(ingested for ingested, _ in results) == len(trades)
+        assert len(repo.get_data_by_symbol("AAPL")) == len(trades)
+        repo.flush()
+        assert len(CSVRepository(csv_path).get_data_by_symbol("AAPL")) == len(trades)
+
+    def test_rows_buffered_until_flush(self, csv_path, monkeypatch):
+        """Test that ingested rows are queryable at once but written on flush."""
+        monkeypatch.setattr(CSVRepository, "FLUSH_INTERVAL", 3600)
+        repo = CSVRepository(csv_path)
+        repo.ingest_trades([_trade(30)])
+        repo.ingest_trades([_trade(31)])
+        assert len(repo.get_data_by_symbol("AAPL")) == 2
+        assert len(csv_path.read_text().splitlines()) == 1
+
+        repo.flush()
+        assert len(csv_path.read_text().splitlines()) == 3
+
+    def test_buffer_flushed_at_row_threshold(self, csv_path, monkeypatch):
+        """Test that the buffer is written once FLUSH_ROWS rows are pending."""
+        monkeypatch.setattr(CSVRepository, "FLUSH_ROWS", 3)
+        monkeypatch.setattr(CSVRepository, "FLUSH_INTERVAL", 3600)
+        repo = CSVRepository(csv_path)
+        repo.ingest_trades([_trade(30), _trade(31)])
+        assert len(csv_path.read_text().splitlines()) == 1
+        repo.ingest_trades([_trade(32)])
+        assert len(csv_path.read_text().splitlines()) == 4
+
+
+class TestQueries:
+    """Tests for reading data back from the repository."""
+
+    def test_symbol_exists(self, csv_path):
+        """Test symbol lookup is case-insensitive and tracks ingests."""
+        repo = CSVRepository(csv_path)
+        assert not repo.symbol_exists("AAPL")
+        repo.ingest_trades([_trade(30)])
+        assert repo.symbol_exists("aapl")
+        assert not repo.symbol_exists("MSFT")
+
+    @pytest.mark.parametrize("engine", ["c", "pyarrow"])
+    def test_data_available_after_reload(self, csv_path, monkeypatch, engine):
+        """Test that persisted trades are queryable by a new instance with either CSV engine."""
+        if engine == "pyarrow":
+            pytest.importorskip("pyarrow")
+        monkeypatch.setattr(repository, "CSV_ENGINE", engine)
+        writer = CSVRepository(csv_path)
+        writer.ingest_trades([_trade(31), _trade(30)])
+        writer.flush()
+
+        repo = CSVRepository(csv_path)
+        assert repo.symbol_exists("AAPL")
+        df = repo.get_data_by_symbol("AAPL")
+        assert len(df) == 2
+        assert df["volume"].tolist() == [1200000, 1200000]
+        assert df["timestamp"].is_monotonic_increasing
+
+    @pytest.mark.parametrize("engine", ["c", "pyarrow"])
+    def test_bad_rows_skipped_on_reload(self, csv_path, caplog, monkeypatch, engine):
+        """Test that rows with a bad timestamp, price or volume are skipped while the others load."""
+        if engine == "pyarrow":
+            pytest.importorskip("pyarrow")
+        monkeypatch.setattr(repository, "CSV_ENGINE", engine)
+        writer = CSVRepository(csv_path)
+        writer.ingest_trades([_trade(30)])
+        writer.flush()
+        with csv_path.open("a") as f:
+            f.write("2300-01-01T00:00:00+00:00,MSFT,410.5,410.5,410.5,410.5,730000\n")
+            f.write("not-a-date,MSFT,410.5,410.5,410.5,410.5,730000\n")
+            f.write("2025-01-02T09:31:00+00:00,MSFT,410.5,410.5,410.5,1.0,\n")
+            f.write("2025-01-02T09:32:00+00:00,MSFT,410.5,410.5,410.5,inf,730000\n")
+            f.write("2025-01-02T09:33:00+00:00,MSFT,410.5,410.5,410.5,410.5,9223372036854775808\n")
+
+        repo = CSVRepository(csv_path)
+        assert "Skipping 5 row(s)" in caplog.text
+        assert len(repo.get_data_by_symbol("AAPL")) == 1
+        assert not repo.symbol_exists("MSFT")
+        assert repo.ingest_trades([_trade(30)]) == (0, 1)
+
+    def test_out_of_order_ingest_sorted(self, csv_path):
+        """Test that late trades are slotted into timestamp order."""
+        repo = CSVRepository(csv_path)
+        repo.ingest_trades([_trade(30, price=190.50), _trade(32, price=191.30)])
+        repo.ingest_trades([_trade(31, price=191.10)])
+
+        df = repo.get_data_by_symbol("AAPL")
+        assert df["close"].tolist() == [190.50, 191.10, 191.30]
+
+    def test_buffers_grow_without_changing_earlier_results(self, csv_path, monkeypatch):
+        """Test appends past capacity and late trades leave frames returned earlier intact."""
+        monkeypatch.setattr(CSVRepository, "INITIAL_CAPACITY", 2)
+        repo = CSVRepository(csv_path)
+        repo.ingest_trades([_trade(30, price=190.0), _trade(31, price=191.0)])
+        first = repo.get_data_by_symbol("AAPL")
+
+        repo.ingest_trades([_trade(minute, price=float(minute)) for minute in range(33, 40)])
+        repo.ingest_trades([_trade(32, price=192.0)])
+        df = repo.get_data_by_symbol("AAPL")
+
+        assert first["close"].tolist() == [190.0, 191.0]
+        assert len(df) == 10
+        assert df["timestamp"].is_monotonic_increasing
+        assert df["close"].tolist()[:4] == [190.0, 191.0, 192.0, 33.0]
+
+    def test_failed_merge_keeps_pending_rows(self, csv_path, monkeypatch):
+        """Test that rows stay queryable after a merge into the cache fails once."""
+        repo = CSVRepository(csv_path)
+        repo.ingest_trades([_trade(30)])
+        append = repo._append_columns
+
+        def failing_append(symbol, new):
+            monkeypatch.setattr(repo, "_append_columns", append)
+            raise OverflowError("conversion failed")
+
+        monkeypatch.setattr(repo, "_append_columns", failing_append)
+        with pytest.raises(OverflowError):
+            repo.get_data_by_symbol("AAPL")
+        assert len(repo.get_data_by_symbol("AAPL")) == 1
+
+    def test_reset_releases_replaced_instance(self, csv_path):
+        """Test that a repository replaced by reset_repository can be garbage collected."""
+        ref = weakref.ref(reset_repository(csv_path))
+        reset_repository(None)
+        gc.collect()
+        assert ref() is None
+
+    def test_time_range_filter(self, csv_path):
+        """Test range bounds are inclusive and naive bounds are taken as UTC."""
+        repo = CSVRepository(csv_path)
+        repo.ingest_trades([_trade(30), _trade(31), _trade(32)])
+
+        df = repo.get_data_by_symbol(
+            "AAPL",
+            start=datetime(2025, 1, 2, 9, 31, 0, tzinfo=timezone.utc),
+            end=datetime(2025, 1, 2, 9, 32, 0, tzinfo=timezone.utc)
+        )
+        assert len(df) == 2
+
+        df = repo.get_data_by_symbol("AAPL", start=datetime(2025, 1, 2, 9, 32, 0))
+        assert len(df) == 1
+
+    def test_clear_data(self, csv_path):
+        """Test that clearing removes data and idempotency keys."""
+        repo = CSVRepository(csv_path)
+        repo.ingest_trades([_trade(30)])
+        repo.clear_data()
+        assert not repo.symbol_exists("AAPL")
+        assert repo.get_data_by_symbol("AAPL").empty
+        assert repo.ingest_trades([_trade(30)]) == (1, 0)
+
+
+class TestInMemoryRepository:
+    """Tests for the non-persistent backend."""
+
+    def test_reset_without_path_is_in_memory(self, csv_path):
+        """Test that reset_repository picks the backend from the path argument."""
+        assert isinstance(reset_repository(csv_path), CSVRepository)
+        assert type(reset_repository(None)) is InMemoryRepository
+
+    def test_ingest_and_query(self):
+        """Test dedupe, ordering and clearing without a file."""
+        repo = InMemoryRepository()
+        assert repo.ingest_trades([_trade(32, price=191.30), _trade(30)]) == (2, 0)
+        assert repo.ingest_trades([_trade(30), _trade(31, price=191.10)]) == (1, 1)
+        assert repo.get_data_by_symbol("aapl")["close"].tolist() == [190.50, 191.10, 191.30]
+
+        repo.clear_data()
+        assert not repo.symbol_exists("AAPL")
@@ -0,0 +1,135 @@
+"""Unit tests for the service layer."""
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from datetime import datetime, timezone
+
+import services
+from kernels import ohlcv_bars, ohlcv_bucket
+from models import IntervalEnum, TradeEvent
+from repository import CSVRepository, InMemoryRepository
+from services import BUCKET_NS, IngestBatcher, TradeService, reset_trade_service
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """Repository on a fresh CSV file, wired into the service singleton."""
+    repository = CSVRepository(tmp_path / "trades.csv")
+    reset_trade_service(repository)
+    return repository
+
+
+def _trade(symbol: str, minute: int) -> TradeEvent:
+    """Build a trade at 09:<minute> UTC."""
+    return TradeEvent(
+        timestamp=datetime(2025, 1, 2, 9, minute, 0, tzinfo=timezone.utc),
+        symbol=symbol,
+        price=190.50,
+        volume=1200000
+    )
+
+
+def _random_rows(n: int, seed: int = 0) -> pd.DataFrame:
+    """Build n timestamp-sorted rows over two days with gaps and ties."""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2025-01-02T09:30:00Z").value
+    timestamps = np.sort(start + rng.integers(0, 2 * 86_400, n) * 1_000_000_000)
+    prices = rng.uniform(100, 200, n)
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "open": prices,
+        "high": prices + rng.uniform(0, 1, n),
+        "low": prices - rng.uniform(0, 1, n),
+        "close": prices,
+        "volume": rng.integers(1, 10_000, n),
+    })
+
+
+class TestAggregation:
+    """Tests for OHLCV aggregation."""
+
+    @pytest.mark.parametrize("kernel", [ohlcv_bars, ohlcv_bucket])
+    @pytest.mark.parametrize("interval", list(IntervalEnum))
+    def test_kernels_match_resample(self, interval, kernel):
+        """Test that both aggregation kernels agree with a pandas resample."""
+        df = _random_rows(5_000)
+        indexed = df.set_index(pd.to_datetime(df["timestamp"], unit="ns", utc=True))
+        bucket = pd.Timedelta(BUCKET_NS[interval], unit="ns")
+        expected = indexed.drop(columns="timestamp").resample(bucket).agg({
+            "open": "first",
+            "high": "max",
+            "low": "min",
+            "close": "last",
+            "volume": "sum"
+        }).dropna()
+        actual = TradeService._aggregate_ohlcv_kernel(df, BUCKET_NS[interval], kernel)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, check_freq=False)
+
+    @pytest.mark.parametrize(
+        "interval, expected",
+        [(IntervalEnum.ONE_MIN, ohlcv_bucket), (IntervalEnum.ONE_DAY, ohlcv_bars)],
+        ids=["short_runs", "long_runs"],
+    )
+    def test_kernel_chosen_by_rows_per_bar(self, monkeypatch, interval, expected):
+        """Test that short runs per bar use the compiled kernel and long runs the NumPy one."""
+        monkeypatch.setattr(services, "NUMBA_AVAILABLE", True)
+        monkeypatch.setattr(
+            TradeService, "_aggregate_ohlcv_kernel", staticmethod(lambda df, bucket_ns, kernel: kernel)
+        )
+        service = TradeService(InMemoryRepository())
+        assert service._aggregate_ohlcv(_random_rows(5_000), interval) is expected
+
+    def test_empty_input(self):
+        """Test that the NumPy kernel returns no bars for no rows."""
+        empty = np.empty(0, np.int64)
+        timestamps, *_ = ohlcv_bars(empty, *[empty.astype(float)] * 4, empty, 60 * 10**9)
+        assert timestamps.size == 0
+
+    def test_kernel_python_fallback(self):
+        """Test the kernel body also runs as plain Python (no Numba)."""
+        df = _random_rows(200)
+        kernel = getattr(ohlcv_bucket, "py_func", ohlcv_bucket)
+        timestamps, open_, high, low, close, volume = kernel(
+            *(df[column].to_numpy() for column in df.columns), 300 * 10**9
+        )
+        assert volume.sum() == df["volume"].sum()
+        assert np.all(timestamps[1:] > timestamps[:-1])
+        assert np.all(high >= low)
+
+
+class TestIngestBatcher:
+    """Tests for coalescing concurrent ingest requests."""
+
+    def test_concurrent_requests_share_one_write(self, repo, monkeypatch):
+        """Test that concurrent submissions are ingested in one call with per-request results."""
+        calls = []
+        ingest = repo.ingest_trade_batches
+
+        def recording_ingest(batches):
+            calls.append(batches)
+            return ingest(batches)
+
+        monkeypatch.setattr(repo, "ingest_trade_batches", recording_ingest)
+
+        async def submit_all():
+            batcher = IngestBatcher()
+            return await asyncio.gather(
+                batcher.submit([_trade("AAPL", 30), _trade("AAPL", 31)]),
+                batcher.submit([_trade("MSFT", 30)]),
+                batcher.submit([_trade("AAPL", 31)]),
+            )
+
+        aapl, msft, duplicate = asyncio.run(submit_all())
+
+        assert len(calls) == 1
+        assert (aapl.symbol, aapl.records_ingested) == ("AAPL", 2)
+        assert (msft.symbol, msft.records_ingested) == ("MSFT", 1)
+        assert (duplicate.records_ingested, duplicate.duplicates_skipped) == (0, 1)
+
+    def test_worker_restarted_on_new_event_loop(self, repo):
+        """Test that the batcher keeps working when used from a fresh event loop."""
+        batcher = IngestBatcher()
+        first = asyncio.run(batcher.submit([_trade("AAPL", 30)]))
+        second = asyncio.run(batcher.submit([_trade("AAPL", 31)]))
+        assert first.records_ingested == second.records_ingested == 1